@@ -0,0 +1,102 @@
+"""
+Cache Helper Functions
+
+Redis-backed response cache for read-heavy endpoints.
+Caching is skipped transparently when REDIS_URL is not configured or Redis is unreachable.
+"""
+
+import hashlib
+import inspect
+import os
+from functools import wraps
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+import redis.asyncio as aioredis
+
+from responses import dumps
+
+# Load environment variables from .env file
+load_dotenv()
+
+redis = None
+
+redis_url = os.getenv("REDIS_URL")
+
+if redis_url:
+    redis = aioredis.from_url(redis_url)
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Return the cached payload for key, or None on miss"""
+    if redis is None:
+        return None
+    try:
+        return await redis.get(key)
+    except Exception:
+        return None
+
+async def cache_set(key: str, payload: bytes, ttl: Optional[int] = None):
+    """Store payload under key, expiring after ttl seconds (never if None)"""
+    if redis is None:
+        return
+    try:
+        if ttl:
+            await redis.setex(key, ttl, payload)
+        else:
+            await redis.set(key, payload)
+    except Exception:
+        pass
+
+async def cache_invalidate(pattern: str):
+    """Delete every key matching pattern"""
+    if redis is None:
+        return
+    try:
+        keys = [k async for k in redis.scan_iter(match=pattern)]
+        if keys:
+            await redis.delete(*keys)
+    except Exception:
+        pass
+
+# blake2b-128 hex digest; stored as a fixed-width prefix of the cached payload
+ETAG_LENGTH = 32
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag value for a response body"""
+    return hashlib.blake2b(body, digest_size=ETAG_LENGTH // 2).hexdigest()
+
+def conditional_response(request: Request, body: bytes, etag: str, cache_control: str) -> Response:
+    """JSON response for body, or an empty 304 when the client already holds etag"""
+    quoted = f'"{etag}"'
+    headers = {"ETag": quoted, "Cache-Control": cache_control}
+    tags = {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}
+    if quoted in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cached(key_fn: Callable[..., str], ttl: Optional[int] = 60):
+    """Serve the handler's JSON result from Redis, keyed by key_fn(**handler kwargs), with ETag revalidation"""
+    cache_control = f"public, max-age={ttl}" if ttl else "public, max-age=86400"
+
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, request: Request, **kwargs):
+            key = key_fn(**kwargs)
+            hit = await cache_get(key)
+            if hit is not None:
+                etag, payload = hit[:ETAG_LENGTH].decode(), hit[ETAG_LENGTH:]
+            else:
+                payload = dumps(await fn(*args, **kwargs))
+                etag = make_etag(payload)
+                await cache_set(key, etag.encode() + payload, ttl)
+            return conditional_response(request, payload, etag, cache_control)
+
+        # Expose the Request to FastAPI alongside the handler's own parameters
+        sig = inspect.signature(fn)
+        wrapper.__signature__ = sig.replace(parameters=[
+            *sig.parameters.values(),
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        return wrapper
+    return decorator
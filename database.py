@@ -5,11 +5,13 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -22,11 +24,20 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    # Bounded, long-lived pool shared by every request
+    _client = AsyncIOMotorClient(
+        database_url,
+        maxPoolSize=100,
+        minPoolSize=10,
+        waitQueueTimeoutMS=2000,
+        serverSelectionTimeoutMS=3000,
+        retryWrites=True,
+        appname="pakkhtun",
+    )
     db = _client[database_name]
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -40,16 +51,42 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None):
     """Get documents from collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
+    cursor = db[collection_name].find(filter_dict or {}, projection)
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=limit)
+
+async def get_raw_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None, sort: list = None):
+    """Get documents by decoding raw BSON batches of up to 200 documents"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    collection = db[collection_name]
+    cursor = collection.find_raw_batches(filter_dict or {}, projection, sort=sort, limit=limit or 0, batch_size=200)
+    docs = []
+    async for batch in cursor:
+        # Decode with the collection's codec options so results match regular cursor reads
+        docs.extend(bson.decode_all(batch, codec_options=collection.codec_options))
+    return docs
+
+async def upsert_documents(collection_name: str, docs: List[dict], key: str, collation: dict = None):
+    """Insert documents missing by key in a single unordered bulk write; existing ones are left untouched"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne({key: d[key]}, {"$setOnInsert": {**d, "created_at": now, "updated_at": now}}, upsert=True, collation=collation)
+        for d in docs
+    ]
+    result = await db[collection_name].bulk_write(ops, ordered=False)
+    return result.upserted_count
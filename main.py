@@ -1,16 +1,73 @@
+import asyncio
+import logging
 import os
+from math import fsum
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Literal, Dict, Any
+from typing import Optional, List, Literal, Dict, Any, get_args
 
-from fastapi import FastAPI, HTTPException, Header, Query
+import orjson
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
+from pydantic_core import core_schema
 from bson import ObjectId
-
-from database import db, create_document, get_documents
-from schemas import MenuItem, Order, OrderItem, Coupon, Offer, User, DeliveryAddress
-
-app = FastAPI(title="Pakkhtun Biryani API")
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+
+from database import db, create_document, get_documents, get_raw_documents, upsert_documents
+from cache import cached, cache_invalidate, conditional_response, make_etag
+from responses import MongoJSONResponse, to_public
+from schemas import Category, MenuItem, Order, OrderItem, Coupon, Offer, User, DeliveryAddress
+
+logger = logging.getLogger(__name__)
+
+# Case-insensitive match for coupon codes; queries must pass the same collation to use the index
+COUPON_COLLATION = {"locale": "en", "strength": 2}
+
+# (collection, keys, options) for the indexes backing the hot query filters
+INDEXES = [
+    ("otp", [("phone", 1), ("created_at", -1)], {}),
+    # TTL purge of expired OTPs (the monitor runs ~every 60s, so handlers still check expiry)
+    ("otp", "expires_at", {"expireAfterSeconds": 0}),
+    # Unique so concurrent login upserts for a new phone can't create duplicate users
+    ("user", "phone", {"unique": True}),
+    ("order", [("phone", 1), ("created_at", -1)], {}),
+    # Date-range scans for the admin sales report
+    ("order", [("created_at", 1), ("status", 1)], {}),
+    ("coupon", [("code", 1), ("active", 1)], {"unique": True, "collation": COUPON_COLLATION, "name": "code_active_ci"}),
+    # available leads so the unfiltered /menu query can use the index prefix too
+    ("menuitem", [("available", 1), ("category", 1)], {}),
+]
+
+async def create_index(collection: str, keys, options: Dict[str, Any]):
+    try:
+        await db[collection].create_index(keys, **options)
+    except Exception as e:
+        logger.warning("Could not create index %s on %s: %s", keys, collection, e)
+
+async def ensure_indexes():
+    """Create all indexes concurrently, each independently so one failure doesn't skip the rest; create_index is a no-op when they exist"""
+    await asyncio.gather(*(create_index(collection, keys, options) for collection, keys, options in INDEXES))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if db is not None:
+        # Warm the connection pool before the first request
+        try:
+            await db.command("ping")
+        except Exception as e:
+            # Each create_index would wait out serverSelectionTimeoutMS too, so don't stall startup on them
+            logger.warning("MongoDB ping failed at startup, skipping index creation: %s", e)
+        else:
+            await ensure_indexes()
+    yield
+    if db is not None:
+        db.client.close()
+
+app = FastAPI(title="Pakkhtun Biryani API", lifespan=lifespan, default_response_class=MongoJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,39 +79,45 @@ app.add_middleware(
 
 # --------- Utilities ---------
 class PyObjectId(ObjectId):
+    """ObjectId usable as a pydantic v2 field or FastAPI path parameter"""
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source, handler):
+        return core_schema.no_info_plain_validator_function(cls.validate, serialization=core_schema.to_string_ser_schema())
+
     @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __get_pydantic_json_schema__(cls, schema, handler):
+        return {"type": "string"}
 
     @classmethod
     def validate(cls, v):
         if isinstance(v, ObjectId):
             return v
-        if not ObjectId.is_valid(v):
+        # Single parse; InvalidId is not a ValueError so pydantic wouldn't report it as a validation error
+        try:
+            return ObjectId(v)
+        except (InvalidId, TypeError):
             raise ValueError("Invalid objectid")
-        return ObjectId(v)
 
-def serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
-    if not doc:
-        return doc
-    doc = dict(doc)
-    _id = doc.get("_id")
-    if isinstance(_id, ObjectId):
-        doc["id"] = str(_id)
-        del doc["_id"]
-    # convert datetimes to isoformat
-    for k, v in list(doc.items()):
-        if isinstance(v, datetime):
-            doc[k] = v.isoformat()
-    return doc
+
+# Static category list, encoded once at import
+CATEGORIES = get_args(Category)
+CATEGORIES_JSON = orjson.dumps(CATEGORIES)
+CATEGORIES_ETAG = make_etag(CATEGORIES_JSON)
+
+# Fields the list endpoints actually render; trims BSON decode and response size
+MENU_PROJECTION = {"title": 1, "category": 1, "description": 1, "price_half": 1, "price_full": 1, "image_url": 1, "is_signature": 1}
+OFFER_PROJECTION = {"title": 1, "description": 1, "banner_url": 1}
+COUPON_PROJECTION = {"code": 1, "description": 1, "type": 1, "value": 1, "min_order": 1}
+ORDER_LIST_PROJECTION = {"items": 0}
 
 # --------- Health/Test ---------
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Pakkhtun Biryani API running"}
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -67,7 +130,7 @@ def test_database():
         if db is not None:
             response["database"] = "✅ Available"
             response["connection_status"] = "Connected"
-            response["collections"] = db.list_collection_names()[:10]
+            response["collections"] = (await db.list_collection_names())[:10]
             response["database"] = "✅ Connected & Working"
     except Exception as e:
         response["database"] = f"⚠️ Error: {str(e)[:80]}"
@@ -82,28 +145,33 @@ class OtpVerify(BaseModel):
     code: str
 
 @app.post("/auth/otp/request")
-def request_otp(payload: OtpRequest):
+async def request_otp(payload: OtpRequest):
     code = "1234"  # Simulated OTP for demo
     expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
-    create_document("otp", {"phone": payload.phone, "code": code, "expires_at": expires_at, "verified": False})
+    await create_document("otp", {"phone": payload.phone, "code": code, "expires_at": expires_at, "verified": False})
     return {"success": True, "message": "OTP sent (demo uses 1234)"}
 
 @app.post("/auth/otp/verify")
-def verify_otp(payload: OtpVerify):
-    rec = db["otp"].find_one({"phone": payload.phone}, sort=[("created_at", -1)])
-    if not rec or rec.get("code") != payload.code:
-        raise HTTPException(status_code=400, detail="Invalid OTP")
-    if rec.get("expires_at") and rec["expires_at"] < datetime.now(timezone.utc):
-        raise HTTPException(status_code=400, detail="OTP expired")
-    # Upsert user
-    user = db["user"].find_one({"phone": payload.phone})
-    if not user:
-        uid = create_document("user", User(phone=payload.phone).model_dump())
-        user = db["user"].find_one({"_id": ObjectId(uid)})
-    # mark verified
-    db["otp"].update_many({"phone": payload.phone}, {"$set": {"verified": True}})
+async def verify_otp(payload: OtpVerify):
+    now = datetime.now(timezone.utc)
+    # Atomically verify and consume the latest matching unexpired OTP
+    rec = await db["otp"].find_one_and_update(
+        {"phone": payload.phone, "code": payload.code, "expires_at": {"$gt": now}, "verified": False},
+        {"$set": {"verified": True, "updated_at": now}},
+        sort=[("created_at", -1)],
+    )
+    if not rec:
+        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
+    # Upsert user and fetch it in the same round trip
+    new_user = User(phone=payload.phone).model_dump(exclude={"phone"})
+    user = await db["user"].find_one_and_update(
+        {"phone": payload.phone},
+        {"$setOnInsert": {**new_user, "created_at": now}, "$set": {"last_login": now, "updated_at": now}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
     token = payload.phone  # simple token for demo
-    return {"token": token, "user": serialize(user)}
+    return MongoJSONResponse({"token": token, "user": to_public(user)})
 
 # Helper for auth
 async def get_phone(x_user_phone: Optional[str] = Header(default=None)) -> Optional[str]:
@@ -111,22 +179,36 @@ async def get_phone(x_user_phone: Optional[str] = Header(default=None)) -> Optio
 
 # --------- Offers / Coupons ---------
 @app.get("/offers")
-def get_offers():
-    items = get_documents("offer", {"active": True}, limit=20)
-    return [serialize(i) for i in items]
+@cached(lambda **_: "offers")
+async def get_offers():
+    items = await get_documents("offer", {"active": True}, limit=20, projection=OFFER_PROJECTION)
+    return [to_public(i) for i in items]
 
 @app.get("/coupons")
-def get_coupons():
-    items = get_documents("coupon", {"active": True}, limit=50)
-    return [serialize(i) for i in items]
+@cached(lambda **_: "coupons")
+async def get_coupons():
+    items = await get_documents("coupon", {"active": True}, limit=50, projection=COUPON_PROJECTION)
+    return [to_public(i) for i in items]
+
+# Active coupons by code (None for unknown codes); cleared whenever coupons are (re)seeded
+COUPONS = TTLCache(maxsize=1024, ttl=300)
+
+async def get_coupon(code: str) -> Optional[Dict[str, Any]]:
+    try:
+        return COUPONS[code]
+    except KeyError:
+        pass
+    c = await db["coupon"].find_one({"code": code, "active": True}, collation=COUPON_COLLATION)
+    COUPONS[code] = c
+    return c
 
 class ApplyCouponPayload(BaseModel):
     code: str
     subtotal: float
 
 @app.post("/cart/apply-coupon")
-def apply_coupon(payload: ApplyCouponPayload):
-    c = db["coupon"].find_one({"code": payload.code.upper(), "active": True})
+async def apply_coupon(payload: ApplyCouponPayload):
+    c = await get_coupon(payload.code)
     if not c:
         raise HTTPException(status_code=404, detail="Coupon not found")
     if payload.subtotal < float(c.get("min_order", 0)):
@@ -139,44 +221,39 @@ def apply_coupon(payload: ApplyCouponPayload):
 
 # --------- Menu ---------
 @app.get("/menu/categories")
-def get_categories():
-    return ["Matka Biryanis", "Kebabs", "Rolls", "Combos", "Add-ons & Drinks"]
+async def get_categories(request: Request):
+    return conditional_response(request, CATEGORIES_JSON, CATEGORIES_ETAG, "public, max-age=86400, immutable")
 
 @app.get("/menu")
-def get_menu(category: Optional[str] = Query(default=None)):
+@cached(lambda category=None, **_: f"menu:{category or 'all'}")
+async def get_menu(category: Optional[Category] = Query(default=None)):
     filt = {"available": True}
     if category:
         filt["category"] = category
-    items = get_documents("menuitem", filt, limit=200)
-    return [serialize(i) for i in items]
+    items = await get_raw_documents("menuitem", filt, limit=200, projection=MENU_PROJECTION)
+    return [to_public(i) for i in items]
 
 class AdminMenuPayload(MenuItem):
     pass
 
 @app.post("/admin/menu")
-def admin_create_menu(item: AdminMenuPayload):
-    _id = create_document("menuitem", item.model_dump())
+async def admin_create_menu(item: AdminMenuPayload):
+    _id = await create_document("menuitem", item.model_dump())
+    await cache_invalidate("menu:*")
     return {"id": _id}
 
 @app.put("/admin/menu/{item_id}")
-def admin_update_menu(item_id: str, payload: Dict[str, Any]):
-    try:
-        oid = ObjectId(item_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid id")
-    db["menuitem"].update_one({"_id": oid}, {"$set": payload})
-    doc = db["menuitem"].find_one({"_id": oid})
+async def admin_update_menu(item_id: PyObjectId, payload: Dict[str, Any]):
+    doc = await db["menuitem"].find_one_and_update({"_id": item_id}, {"$set": payload}, return_document=ReturnDocument.AFTER)
     if not doc:
         raise HTTPException(status_code=404, detail="Not found")
-    return serialize(doc)
+    await cache_invalidate("menu:*")
+    return MongoJSONResponse(to_public(doc))
 
 @app.delete("/admin/menu/{item_id}")
-def admin_delete_menu(item_id: str):
-    try:
-        oid = ObjectId(item_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid id")
-    db["menuitem"].delete_one({"_id": oid})
+async def admin_delete_menu(item_id: PyObjectId):
+    await db["menuitem"].delete_one({"_id": item_id})
+    await cache_invalidate("menu:*")
     return {"deleted": True}
 
 # --------- User Profile ---------
@@ -184,36 +261,45 @@ class AddressPayload(DeliveryAddress):
     pass
 
 @app.get("/me")
-def get_me(x_user_phone: Optional[str] = Header(default=None)):
+async def get_me(x_user_phone: Optional[str] = Header(default=None)):
     if not x_user_phone:
         raise HTTPException(status_code=401, detail="Missing phone header")
-    u = db["user"].find_one({"phone": x_user_phone})
+    u = await db["user"].find_one({"phone": x_user_phone})
     if not u:
         raise HTTPException(status_code=404, detail="User not found")
-    return serialize(u)
+    return MongoJSONResponse(to_public(u))
 
 @app.post("/me/address")
-def add_address(payload: AddressPayload, x_user_phone: Optional[str] = Header(default=None)):
+async def add_address(payload: AddressPayload, x_user_phone: Optional[str] = Header(default=None)):
     if not x_user_phone:
         raise HTTPException(status_code=401, detail="Missing phone header")
-    db["user"].update_one({"phone": x_user_phone}, {"$push": {"addresses": payload.model_dump()}}, upsert=True)
-    u = db["user"].find_one({"phone": x_user_phone})
-    return serialize(u)
+    u = await db["user"].find_one_and_update(
+        {"phone": x_user_phone},
+        {"$push": {"addresses": payload.model_dump()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return MongoJSONResponse(to_public(u))
 
 @app.post("/me/favorites/{item_id}")
-def toggle_favorite(item_id: str, x_user_phone: Optional[str] = Header(default=None)):
+async def toggle_favorite(item_id: str, x_user_phone: Optional[str] = Header(default=None)):
     if not x_user_phone:
         raise HTTPException(status_code=401, detail="Missing phone header")
-    u = db["user"].find_one({"phone": x_user_phone})
+    # Pipeline update toggles membership server-side in a single round trip
+    favs = {"$ifNull": ["$favorites", []]}
+    u = await db["user"].find_one_and_update(
+        {"phone": x_user_phone},
+        [{"$set": {"favorites": {"$cond": [
+            {"$in": [item_id, favs]},
+            {"$setDifference": [favs, [item_id]]},
+            {"$concatArrays": [favs, [item_id]]},
+        ]}}}],
+        projection={"favorites": 1},
+        return_document=ReturnDocument.AFTER,
+    )
     if not u:
         raise HTTPException(status_code=404, detail="User not found")
-    favs = set(u.get("favorites", []))
-    if item_id in favs:
-        db["user"].update_one({"phone": x_user_phone}, {"$pull": {"favorites": item_id}})
-        action = "removed"
-    else:
-        db["user"].update_one({"phone": x_user_phone}, {"$addToSet": {"favorites": item_id}})
-        action = "added"
+    action = "added" if item_id in u.get("favorites", []) else "removed"
     return {"status": action}
 
 # --------- Orders ---------
@@ -225,166 +311,230 @@ class CreateOrderPayload(BaseModel):
     coupon_code: Optional[str] = None
     payment_method: Literal["razorpay", "upi", "cod"] = "cod"
 
+# Carts above this size do their CPU-bound work in the threadpool; smaller ones aren't worth the dispatch
+LARGE_CART_ITEMS = 32
+
+async def run_cpu_bound(size: int, fn, *args):
+    if size > LARGE_CART_ITEMS:
+        return await run_in_threadpool(fn, *args)
+    return fn(*args)
+
+def reprice_items(items: List[OrderItem], oids: Dict[str, ObjectId], prices: Dict[ObjectId, Dict[str, Any]]):
+    priced = []
+    for i in items:
+        m = prices.get(oids[i.item_id])
+        unit_price = m.get(f"price_{i.variant}") if m else None
+        if unit_price is None:
+            raise HTTPException(status_code=400, detail=f"Item unavailable: {i.title}")
+        priced.append(i.model_copy(update={"unit_price": float(unit_price), "total_price": float(unit_price) * i.quantity}))
+    return priced, fsum(i.unit_price * i.quantity for i in priced)
+
+async def price_items(items: List[OrderItem]):
+    """Re-price cart lines from the menu in one query; returns (items, subtotal)"""
+    try:
+        oids = {i.item_id: ObjectId(i.item_id) for i in items}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid item id")
+    # Compare parsed ObjectIds, not strings: str(ObjectId) is lowercase but clients may send uppercase hex
+    unique_oids = set(oids.values())
+    menu = await db["menuitem"].find(
+        {"_id": {"$in": list(unique_oids)}, "available": True},
+        {"price_half": 1, "price_full": 1},
+    ).to_list(length=len(unique_oids))
+    prices = {m["_id"]: m for m in menu}
+    return await run_cpu_bound(len(items), reprice_items, items, oids, prices)
+
 @app.post("/orders")
-def create_order(payload: CreateOrderPayload):
+async def create_order(payload: CreateOrderPayload):
     if not payload.items:
         raise HTTPException(status_code=400, detail="No items")
-    # compute totals
-    subtotal = sum([i.total_price for i in payload.items])
+    # Menu pricing and coupon lookup are independent, so overlap the two round trips
+    c = None
+    if payload.coupon_code:
+        (items, subtotal), c = await asyncio.gather(price_items(payload.items), get_coupon(payload.coupon_code))
+    else:
+        items, subtotal = await price_items(payload.items)
     delivery_fee = 0 if payload.delivery_type == "takeaway" else 20
     discount = 0.0
-    if payload.coupon_code:
-        c = db["coupon"].find_one({"code": payload.coupon_code.upper(), "active": True})
-        if c and subtotal >= float(c.get("min_order", 0)):
-            discount = (float(c["value"]) if c["type"] == "flat" else subtotal * float(c["value"]) / 100.0)
+    if c and subtotal >= float(c.get("min_order", 0)):
+        discount = (float(c["value"]) if c["type"] == "flat" else subtotal * float(c["value"]) / 100.0)
     total = max(0.0, subtotal - discount + delivery_fee)
-    order_doc = Order(
-        user_id=None,
-        phone=payload.phone,
-        items=payload.items,
-        subtotal=subtotal,
-        discount=round(discount, 2),
-        delivery_fee=delivery_fee,
-        total=round(total, 2),
-        delivery_type=payload.delivery_type,
-        address=payload.address,
-        payment_method=payload.payment_method,
-        payment_status=("cod" if payload.payment_method == "cod" else "pending"),
-        status="pending",
-        eta_minutes=35,
-        coupon_code=payload.coupon_code,
-    ).model_dump()
-    oid = create_document("order", order_doc)
-    order = db["order"].find_one({"_id": ObjectId(oid)})
+    # Every component is already validated (payload models, server-side prices), so skip re-validation
+    def build_order():
+        return Order.model_construct(
+            user_id=None,
+            phone=payload.phone,
+            items=items,
+            subtotal=round(subtotal, 2),
+            discount=round(discount, 2),
+            delivery_fee=delivery_fee,
+            total=round(total, 2),
+            delivery_type=payload.delivery_type,
+            address=payload.address,
+            payment_method=payload.payment_method,
+            payment_status=("cod" if payload.payment_method == "cod" else "pending"),
+            status="pending",
+            eta_minutes=35,
+            coupon_code=payload.coupon_code,
+        ).model_dump(mode="python", exclude_none=True)
+    order_doc = await run_cpu_bound(len(items), build_order)
+    order_doc["created_at"] = order_doc["updated_at"] = datetime.now(timezone.utc)
+    # insert_one sets _id on order_doc, so the stored document can be returned without re-fetching it
+    await db["order"].insert_one(order_doc)
     payment = None
     if payload.payment_method in ("razorpay", "upi"):
         # Simulated payment payload
-        payment = {"gateway": payload.payment_method, "order_id": str(oid), "amount": order_doc["total"]}
-    return {"order": serialize(order), "payment": payment}
+        payment = {"gateway": payload.payment_method, "order_id": str(order_doc["_id"]), "amount": order_doc["total"]}
+    return MongoJSONResponse({"order": to_public(order_doc), "payment": payment})
 
 @app.get("/orders/{order_id}")
-def get_order(order_id: str):
-    try:
-        oid = ObjectId(order_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid id")
-    o = db["order"].find_one({"_id": oid})
+async def get_order(order_id: PyObjectId):
+    o = await db["order"].find_one({"_id": order_id})
     if not o:
         raise HTTPException(status_code=404, detail="Not found")
-    return serialize(o)
+    return MongoJSONResponse(to_public(o))
 
 @app.get("/orders")
-def list_my_orders(x_user_phone: Optional[str] = Header(default=None)):
+async def list_my_orders(x_user_phone: Optional[str] = Header(default=None)):
     if not x_user_phone:
         raise HTTPException(status_code=401, detail="Missing phone header")
-    items = list(db["order"].find({"phone": x_user_phone}).sort("created_at", -1).limit(50))
-    return [serialize(i) for i in items]
+    items = await get_raw_documents("order", {"phone": x_user_phone}, limit=50, projection=ORDER_LIST_PROJECTION, sort=[("created_at", -1)])
+    return MongoJSONResponse([to_public(i) for i in items])
 
 @app.get("/track/{order_id}")
-def track_order(order_id: str):
-    return get_order(order_id)
+async def track_order(order_id: PyObjectId):
+    return await get_order(order_id)
 
 # Admin order status update
 class UpdateStatusPayload(BaseModel):
     status: Literal["accepted", "being_prepared", "out_for_delivery", "delivered", "cancelled"]
 
 @app.post("/admin/orders/{order_id}/status")
-def update_order_status(order_id: str, payload: UpdateStatusPayload):
-    try:
-        oid = ObjectId(order_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid id")
+async def update_order_status(order_id: PyObjectId, payload: UpdateStatusPayload):
     upd = {"status": payload.status, "updated_at": datetime.now(timezone.utc)}
     if payload.status == "out_for_delivery":
         upd["eta_minutes"] = 15
-    db["order"].update_one({"_id": oid}, {"$set": upd})
-    o = db["order"].find_one({"_id": oid})
-    return serialize(o)
+    o = await db["order"].find_one_and_update({"_id": order_id}, {"$set": upd}, return_document=ReturnDocument.AFTER)
+    if not o:
+        raise HTTPException(status_code=404, detail="Not found")
+    return MongoJSONResponse(to_public(o))
+
+# Admin sales report
+@app.get("/admin/reports/sales")
+async def sales_report(days: int = Query(default=30, ge=1, le=366)):
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    # Totals are summed inside the aggregation so only one result row crosses the wire
+    pipeline = [
+        {"$match": {"created_at": {"$gte": since}, "status": {"$ne": "cancelled"}}},
+        {"$group": {
+            "_id": None,
+            "orders": {"$sum": 1},
+            "items_sold": {"$sum": {"$sum": "$items.quantity"}},
+            "gross": {"$sum": {"$sum": {"$map": {
+                "input": "$items",
+                "in": {"$multiply": ["$$this.unit_price", "$$this.quantity"]},
+            }}}},
+            "discount": {"$sum": "$discount"},
+            "revenue": {"$sum": "$total"},
+        }},
+        {"$project": {"_id": 0}},
+    ]
+    rows = await db["order"].aggregate(pipeline).to_list(length=1)
+    report = rows[0] if rows else {"orders": 0, "items_sold": 0, "gross": 0.0, "discount": 0.0, "revenue": 0.0}
+    return {"days": days, **report}
 
 # --------- Seed sample data ---------
 @app.post("/admin/seed")
-def seed_data():
-    if db["menuitem"].count_documents({}) == 0:
-        samples = [
-            {
-                "title": "Signature Matka Chicken Biryani",
-                "category": "Matka Biryanis",
-                "description": "Fragrant basmati, tender chicken, sealed in matka.",
-                "image_url": "https://images.unsplash.com/photo-1604908554049-1e4f7f1e978a",
-                "price_half": 199,
-                "price_full": 349,
-                "is_signature": True,
-                "available": True,
-            },
-            {
-                "title": "Mutton Matka Biryani",
-                "category": "Matka Biryanis",
-                "description": "Slow-cooked mutton with saffron basmati.",
-                "image_url": "https://images.unsplash.com/photo-1551183053-bf91a1d81141",
-                "price_half": 299,
-                "price_full": 499,
-                "is_signature": True,
-                "available": True,
-            },
-            {
-                "title": "Chicken Malai Kebab",
-                "category": "Kebabs",
-                "description": "Creamy, melt-in-mouth kebabs.",
-                "image_url": "https://images.unsplash.com/photo-1562967914-608f82629710",
-                "price_half": None,
-                "price_full": 249,
-                "available": True,
-            },
-            {
-                "title": "Chicken Tikka Roll",
-                "category": "Rolls",
-                "description": "Char-grilled tikka wrapped in rumali roti.",
-                "image_url": "https://images.unsplash.com/photo-1604908554049-1e4f7f1e978a",
-                "price_half": None,
-                "price_full": 179,
-                "available": True,
-            },
-            {
-                "title": "Family Combo",
-                "category": "Combos",
-                "description": "2 Matka Biryanis + 2 Kebabs + 4 Drinks",
-                "image_url": "https://images.unsplash.com/photo-1544025162-d76694265947",
-                "price_half": None,
-                "price_full": 1099,
-                "available": True,
-            },
-            {
-                "title": "Gulab Jamun",
-                "category": "Add-ons & Drinks",
-                "description": "Soft, warm, and syrupy.",
-                "image_url": "https://images.unsplash.com/photo-1604908176839-9c1790c595d4",
-                "price_half": None,
-                "price_full": 79,
-                "available": True,
-            },
-        ]
-        for s in samples:
-            create_document("menuitem", s)
-    if db["offer"].count_documents({}) == 0:
-        create_document("offer", {
+async def seed_data():
+    samples = [
+        {
+            "title": "Signature Matka Chicken Biryani",
+            "category": "Matka Biryanis",
+            "description": "Fragrant basmati, tender chicken, sealed in matka.",
+            "image_url": "https://images.unsplash.com/photo-1604908554049-1e4f7f1e978a",
+            "price_half": 199,
+            "price_full": 349,
+            "is_signature": True,
+            "available": True,
+        },
+        {
+            "title": "Mutton Matka Biryani",
+            "category": "Matka Biryanis",
+            "description": "Slow-cooked mutton with saffron basmati.",
+            "image_url": "https://images.unsplash.com/photo-1551183053-bf91a1d81141",
+            "price_half": 299,
+            "price_full": 499,
+            "is_signature": True,
+            "available": True,
+        },
+        {
+            "title": "Chicken Malai Kebab",
+            "category": "Kebabs",
+            "description": "Creamy, melt-in-mouth kebabs.",
+            "image_url": "https://images.unsplash.com/photo-1562967914-608f82629710",
+            "price_half": None,
+            "price_full": 249,
+            "available": True,
+        },
+        {
+            "title": "Chicken Tikka Roll",
+            "category": "Rolls",
+            "description": "Char-grilled tikka wrapped in rumali roti.",
+            "image_url": "https://images.unsplash.com/photo-1604908554049-1e4f7f1e978a",
+            "price_half": None,
+            "price_full": 179,
+            "available": True,
+        },
+        {
+            "title": "Family Combo",
+            "category": "Combos",
+            "description": "2 Matka Biryanis + 2 Kebabs + 4 Drinks",
+            "image_url": "https://images.unsplash.com/photo-1544025162-d76694265947",
+            "price_half": None,
+            "price_full": 1099,
+            "available": True,
+        },
+        {
+            "title": "Gulab Jamun",
+            "category": "Add-ons & Drinks",
+            "description": "Soft, warm, and syrupy.",
+            "image_url": "https://images.unsplash.com/photo-1604908176839-9c1790c595d4",
+            "price_half": None,
+            "price_full": 79,
+            "available": True,
+        },
+    ]
+    offers = [
+        {
             "title": "Best Biryani – G Plus Guwahati Food Awards 2024",
             "description": "Celebrating our win with 15% off on Matka Biryanis!",
             "banner_url": "https://images.unsplash.com/photo-1606787366850-de6330128bfc",
             "active": True,
-        })
-    if db["coupon"].count_documents({}) == 0:
-        create_document("coupon", {
+        },
+    ]
+    coupons = [
+        {
             "code": "PAKKTUN15",
             "description": "15% off on orders above ₹499",
             "type": "percent",
             "value": 15,
             "min_order": 499,
             "active": True,
-        })
+        },
+    ]
+    # One idempotent bulk upsert per collection, all issued concurrently
+    await asyncio.gather(
+        upsert_documents("menuitem", samples, "title"),
+        upsert_documents("offer", offers, "title"),
+        upsert_documents("coupon", [Coupon(**c).model_dump() for c in coupons], "code", collation=COUPON_COLLATION),
+    )
+    for pattern in ("menu:*", "offers", "coupons"):
+        await cache_invalidate(pattern)
+    COUPONS.clear()
     return {"seeded": True}
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(app, host="0.0.0.0", port=port, loop="uvloop", http="httptools")
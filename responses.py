@@ -0,0 +1,39 @@
+"""
+JSON Response Helpers
+
+orjson-based encoding for MongoDB documents. Datetimes are encoded natively by orjson
+(naive values are treated as UTC), and ObjectIds fall back to their string form.
+"""
+
+from typing import Any, Dict
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+def json_default(obj: Any) -> Any:
+    """Encode types orjson doesn't handle natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes"""
+    return orjson.dumps(content, default=json_default, option=ORJSON_OPTIONS)
+
+def to_public(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Rename a Mongo document's _id to id in place; cursors yield fresh dicts, so no copy is needed"""
+    if not doc:
+        return doc
+    _id = doc.pop("_id", None)
+    if _id is not None:
+        doc["id"] = str(_id)
+    return doc
+
+class MongoJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also encodes ObjectIds and emits UTC datetimes"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -4,11 +4,16 @@ Database Schemas for Pakkhtun Biryani
 Each Pydantic model corresponds to a MongoDB collection (lowercased class name).
 """
 from typing import List, Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from datetime import datetime
 
+# Shared by every schema: tolerate unknown keys from stored documents, no re-validation on assignment
+SCHEMA_CONFIG = ConfigDict(extra="ignore", validate_assignment=False, arbitrary_types_allowed=True)
+
 # Users
 class User(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     phone: str = Field(..., description="Phone number as login")
     name: Optional[str] = Field(None, description="Full name")
     email: Optional[str] = Field(None, description="Email address")
@@ -19,17 +24,21 @@ class User(BaseModel):
 
 # OTP session (short-lived)
 class Otp(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     phone: str
     code: str
     expires_at: datetime
     verified: bool = False
 
 # Menu
+Category = Literal["Matka Biryanis", "Kebabs", "Rolls", "Combos", "Add-ons & Drinks"]
+
 class MenuItem(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     title: str
-    category: Literal[
-        "Matka Biryanis", "Kebabs", "Rolls", "Combos", "Add-ons & Drinks"
-    ]
+    category: Category
     description: Optional[str] = None
     image_url: Optional[str] = None
     price_half: Optional[float] = Field(None, ge=0)
@@ -38,6 +47,8 @@ class MenuItem(BaseModel):
     available: bool = True
 
 class Coupon(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     code: str
     description: Optional[str] = None
     type: Literal["flat", "percent"] = "percent"
@@ -45,7 +56,15 @@ class Coupon(BaseModel):
     min_order: float = Field(0, ge=0)
     active: bool = True
 
+    # Stored upper-cased so lookups hit the unique code index directly
+    @field_validator("code")
+    @classmethod
+    def upper_code(cls, v: str) -> str:
+        return v.upper()
+
 class Offer(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     title: str
     description: Optional[str] = None
     banner_url: Optional[str] = None
@@ -53,6 +72,8 @@ class Offer(BaseModel):
 
 # Orders
 class OrderItem(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     item_id: str
     title: str
     variant: Literal["half", "full"] = "full"
@@ -62,6 +83,8 @@ class OrderItem(BaseModel):
     image_url: Optional[str] = None
 
 class DeliveryAddress(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     label: Optional[str] = None
     line1: str
     line2: Optional[str] = None
@@ -72,6 +95,8 @@ class DeliveryAddress(BaseModel):
     lng: Optional[float] = None
 
 class Order(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     user_id: Optional[str] = None
     phone: str
     items: List[OrderItem]
@@ -91,6 +116,8 @@ class Order(BaseModel):
     notes: Optional[str] = None
 
 class Feedback(BaseModel):
+    model_config = SCHEMA_CONFIG
+
     order_id: str
     rating: int = Field(..., ge=1, le=5)
     comment: Optional[str] = None